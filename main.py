@@ -4,22 +4,31 @@ FastAPI backend for serving file system data and 3D visualization
 """
 
 import argparse
+import asyncio
+import functools
+import hashlib
+import heapq
 import os
-import json
 import math
 import mimetypes
+import re
 import shutil
-import subprocess
-from threading import Lock, Thread, Event
+import stat
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+from threading import Lock
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Mapping, Optional, Set, Tuple, TypedDict, Union
 
+import orjson
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
 
 
 load_dotenv()
@@ -43,6 +52,16 @@ def _env_int(name: str, default: int) -> int:
         return default
 
 
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        return default
+
+
 def _resolve_root_dir(path_str: str) -> Path:
     candidate = Path(path_str).expanduser()
     resolved = candidate.resolve()
@@ -87,10 +106,28 @@ class FileInfo(BaseModel):
     preview_unavailable_reason: Optional[str] = None
 
 
+class FileInfoDict(TypedDict):
+    """Plain-dict form of FileInfo used on the directory listing hot path."""
+    name: str
+    path: str
+    is_directory: bool
+    size: int
+    modified: float
+    mime_type: Optional[str]
+    log_size: float
+    hex_preview: None
+    is_favourite: bool
+    preview_available: bool
+    preview_unavailable_reason: Optional[str]
+
+
 class DirectoryListing(BaseModel):
     path: str
     parent: Optional[str]
     items: List[FileInfo]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= to fetch the next page
+    has_more: bool = False
+    total: Optional[int] = None  # entries in the directory, reported for paged requests
 
 
 class HexPreview(BaseModel):
@@ -98,17 +135,32 @@ class HexPreview(BaseModel):
     lines: List[HexLine]
 
 
+class HexPreviewBatchRequest(BaseModel):
+    paths: List[str]
+    # os.read allocates the full size up front, once per path in the batch.
+    max_bytes: int = Field(256, ge=0, le=4096)
+
+
+class FileInfoBatchRequest(BaseModel):
+    paths: List[str]
+
+
 class FavouriteRequest(BaseModel):
     path: str
     favourite: bool
 
 
 class OpenFileProcess(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     pid: int
     command: str
 
 
 class OpenFileEntry(BaseModel):
+    # Snapshot entries are shared between readers rather than copied.
+    model_config = ConfigDict(frozen=True)
+
     path: str
     resolved_path: Optional[str] = None
     processes: List[OpenFileProcess]
@@ -119,6 +171,9 @@ class CapabilityResponse(BaseModel):
 
 
 # Initialize FastAPI app
+# No default_response_class: routes returning models are serialised by
+# pydantic-core straight to bytes, which a custom class would bypass. Routes
+# that build plain dicts/lists encode them with orjson themselves.
 app = FastAPI(
     title="FileCity",
     description="3D Cyberpunk File System Browser",
@@ -139,16 +194,58 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 
 
 ROOT_DIR = _determine_root_dir()
+ROOT_DIR_STR = os.fspath(ROOT_DIR)
+ROOT_DIR_PREFIX = ROOT_DIR_STR if ROOT_DIR_STR.endswith(os.sep) else ROOT_DIR_STR + os.sep
 HOST = os.getenv("FILECITY_HOST", "0.0.0.0")
 PORT = _env_int("FILECITY_PORT", 8000)
 RELOAD = _env_bool("FILECITY_RELOAD", True)
 LSOF_REQUESTED = _env_bool("FILECITY_LSOF_ENABLED", True)
-LSOF_BINARY_PRESENT = shutil.which("lsof") is not None
+LSOF_PATH = shutil.which("lsof")
+LSOF_BINARY_PRESENT = LSOF_PATH is not None
+# Resolved once so each poll skips the PATH search.
+LSOF_COMMAND = (LSOF_PATH or "lsof", "-Fn")
 LSOF_ENABLED = LSOF_REQUESTED and LSOF_BINARY_PRESENT
 
+HEX_BATCH_MAX_PATHS = 256
+FILE_INFO_BATCH_MAX_PATHS = 256
+STAT_CACHE_TTL = 2.0
+
+# Encoded /api/browse bodies keyed on (path, resolved path). Each value holds
+# (created, (directory mtime_ns, favourites version), body, etag), so a newer
+# listing of the same directory replaces the old body instead of sitting beside
+# it. Adding or removing children bumps the directory mtime, but edits to
+# existing files do not, so entries also expire after a short TTL. The cache is
+# bounded both by entry count and by the total size of the stored bodies.
+# A TTL of 0 turns the cache off.
+BROWSE_CACHE: "OrderedDict[Tuple[str, str], Tuple[float, Tuple[int, int], bytes, str]]" = OrderedDict()
+BROWSE_CACHE_LOCK = Lock()
+BROWSE_CACHE_MAX_ENTRIES = max(1, _env_int("FILECITY_BROWSE_CACHE_ENTRIES", 256))
+BROWSE_CACHE_MAX_BYTES = max(0, _env_int("FILECITY_BROWSE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+BROWSE_CACHE_TTL = max(0.0, _env_float("FILECITY_BROWSE_CACHE_TTL", 2.0))
+_BROWSE_CACHE_BYTES = 0
+# FileInfo results from /api/file-info, keyed on the path and the stat fields
+# that a content change would move.
+FILE_INFO_CACHE: "OrderedDict[tuple, FileInfo]" = OrderedDict()
+FILE_INFO_CACHE_LOCK = Lock()
+FILE_INFO_CACHE_MAX_ENTRIES = 512
+# Clients may keep responses but must revalidate; a matching ETag costs a 304.
+HTTP_CACHE_CONTROL = "private, no-cache"
+
 PROCESS_MONITOR_LOCK = Lock()
 PROCESS_MONITOR = None
 
+# Worker threads behind every asyncio.to_thread call (directory scans, stats,
+# hex reads). Sized explicitly rather than relying on min(32, cpus + 4).
+IO_THREADS = max(1, _env_int("FILECITY_IO_THREADS", 64))
+IO_EXECUTOR: Optional[ThreadPoolExecutor] = None
+
+
+@app.on_event("startup")
+async def _startup_executor() -> None:
+    global IO_EXECUTOR
+    IO_EXECUTOR = ThreadPoolExecutor(max_workers=IO_THREADS, thread_name_prefix="filecity-io")
+    asyncio.get_running_loop().set_default_executor(IO_EXECUTOR)
+
 
 @app.on_event("startup")
 async def _startup_monitor() -> None:
@@ -157,148 +254,199 @@ async def _startup_monitor() -> None:
 
 @app.on_event("shutdown")
 async def _shutdown_monitor() -> None:
-    stop_process_monitor()
+    await stop_process_monitor()
+
+
+@app.on_event("shutdown")
+async def _shutdown_executor() -> None:
+    global IO_EXECUTOR
+    executor = IO_EXECUTOR
+    IO_EXECUTOR = None
+    if executor is not None:
+        # Queued work belongs to requests that are being torn down anyway.
+        executor.shutdown(wait=False, cancel_futures=True)
 
 
 class LsofMonitor:
-    """Background task that periodically snapshots lsof output for the configured root."""
+    """Background task that periodically snapshots lsof output for the configured root.
+
+    Polling runs every ``interval`` seconds while clients ask for open files and
+    backs off exponentially (up to ``max_interval``) once they stop asking.
+
+    The monitor runs as an asyncio task on the server's event loop, and all of
+    its methods must be called from that loop. The snapshot has a single
+    writer, so it needs no lock.
+    """
 
-    def __init__(self, root: Path, interval: float = 2.0) -> None:
+    def __init__(
+        self,
+        root: Path,
+        interval: float = 2.0,
+        idle_grace: float = 10.0,
+        max_interval: float = 60.0
+    ) -> None:
         self.root = root
         self.interval = max(0.5, float(interval))
-        self._lock = Lock()
-        self._stop_event = Event()
-        self._thread: Optional[Thread] = None
+        self.idle_grace = max(self.interval, float(idle_grace))
+        self.max_interval = max(self.interval, float(max_interval))
+        # Set to cut the current wait short after a period of idling.
+        self._wake_event = asyncio.Event()
+        self._last_request_ts = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
         self._snapshot: Dict[str, OpenFileEntry] = {}
         self._last_warning_emitted = False
 
     def is_running(self) -> bool:
-        thread = self._thread
-        return thread is not None and thread.is_alive()
+        task = self._task
+        return task is not None and not task.done()
 
     def start(self) -> None:
         if self.is_running():
             return
-        self._stop_event.clear()
-        thread = Thread(target=self._run, name="FileCityLsofMonitor", daemon=True)
-        self._thread = thread
-        thread.start()
-
-    def stop(self) -> None:
-        self._stop_event.set()
-        thread = self._thread
-        if thread:
-            thread.join(timeout=1.5)
-        self._thread = None
-        with self._lock:
-            self._snapshot = {}
+        self._wake_event.clear()
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="FileCityLsofMonitor")
+
+    async def stop(self) -> None:
+        task = self._task
+        self._task = None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._snapshot = {}
         self._last_warning_emitted = False
 
-    def snapshot(self) -> Dict[str, OpenFileEntry]:
-        with self._lock:
-            return {path: entry.copy(deep=True) for path, entry in self._snapshot.items()}
+    def snapshot(self) -> Mapping[str, OpenFileEntry]:
+        """Return the current snapshot; it is replaced wholesale, never mutated."""
+        return self._snapshot
+
+    def request_refresh(self) -> None:
+        """Ask the worker to poll now instead of finishing its current wait."""
+        self._wake_event.set()
 
     def get_entries_for_directory(self, directory: Path) -> List[OpenFileEntry]:
-        target_relative = _absolute_to_client_path(directory)
+        now = time.monotonic()
+        was_idle = now - self._last_request_ts >= self.idle_grace
+        self._last_request_ts = now
+        if was_idle:
+            self.request_refresh()
+        # Callers pass a directory already resolved by get_safe_path.
+        target_relative = _resolved_to_client_path(os.fspath(directory))
         snapshot = self.snapshot()
-        if target_relative == '/':
-            prefix = ''
-        else:
-            prefix = f"{target_relative.rstrip('/')}/"
-        selection: List[OpenFileEntry] = []
-        for path, entry in snapshot.items():
-            if path == target_relative or path.startswith(prefix):
-                selection.append(entry.copy(deep=True))
-        selection.sort(key=lambda item: item.path.lower())
-        return selection
-
-    def _run(self) -> None:
-        while not self._stop_event.is_set():
-            snapshot = self._collect_snapshot()
+        prefix = _child_client_prefix(target_relative)
+        # Lowercase each path once up front rather than inside a sort key callback;
+        # the exact path breaks ties, so entries themselves are never compared.
+        keyed = [
+            (path.lower(), path, entry)
+            for path, entry in snapshot.items()
+            if path == target_relative or path.startswith(prefix)
+        ]
+        keyed.sort()
+        return [entry for _, _, entry in keyed]
+
+    def _next_wait(self) -> float:
+        idle = time.monotonic() - self._last_request_ts
+        if idle < self.idle_grace:
+            return self.interval
+        backoff = self.interval * 2 ** min(6, int(idle / self.idle_grace))
+        return min(self.max_interval, backoff)
+
+    async def _run(self) -> None:
+        while True:
+            self._wake_event.clear()
+            snapshot = await self._collect_snapshot()
             if snapshot is not None:
-                with self._lock:
-                    self._snapshot = snapshot
-            if self._stop_event.wait(self.interval):
-                break
+                self._snapshot = snapshot
+            try:
+                await asyncio.wait_for(self._wake_event.wait(), self._next_wait())
+            except asyncio.TimeoutError:
+                pass
+
+    @staticmethod
+    def _parse_lsof_output(output: bytes) -> Set[str]:
+        """Collect client paths of open files inside the root from `lsof -Fn` output."""
+        entries: Set[str] = set()
+        ttl_bucket = int(time.monotonic() // STAT_CACHE_TTL)
+        # lsof lists every open file on the host. The kernel reports canonical
+        # paths, so anything inside the root starts with ROOT_DIR; matching that
+        # prefix in one regex scan skips most lines before any Python work.
+        for match in _lsof_root_line_re(ROOT_DIR_STR).finditer(output):
+            raw_path = os.fsdecode(match.group(1)).strip()
+            if not raw_path:
+                continue
+            # realpath canonicalises the path, so the client path and its resolved
+            # form are the same string; lsof repeats paths heavily, hence the cache.
+            client_path = _cached_client_path(raw_path, ttl_bucket)
+            if client_path is None:
+                continue
+            entries.add(client_path)
+        return entries
 
-    def _collect_snapshot(self) -> Optional[Dict[str, OpenFileEntry]]:
+    async def _collect_snapshot(self) -> Optional[Dict[str, OpenFileEntry]]:
         try:
-            result = subprocess.run(
-                ["lsof", "-Fn"],
-                capture_output=True,
-                text=True,
-                check=False,
-                timeout=5
+            proc = await asyncio.create_subprocess_exec(
+                *LSOF_COMMAND,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
             )
         except FileNotFoundError:
             if not self._last_warning_emitted:
                 print("Warning: lsof not found; disabling process monitoring cache.")
                 self._last_warning_emitted = True
             return {}
-        except subprocess.TimeoutExpired:
+
+        try:
+            # communicate() drains both pipes together, so a chatty stderr cannot
+            # stall lsof while stdout is still being read.
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), 5)
+        except asyncio.TimeoutError:
             if not self._last_warning_emitted:
                 print("Warning: lsof timed out while collecting open files.")
                 self._last_warning_emitted = True
             return None
+        finally:
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
 
-        if result.returncode not in (0, 1):
+        if proc.returncode not in (0, 1):
             if not self._last_warning_emitted:
-                detail = result.stderr.strip() or f"lsof exited with code {result.returncode}"
+                detail = os.fsdecode(stderr).strip() or f"lsof exited with code {proc.returncode}"
                 print(f"Warning: {detail}")
                 self._last_warning_emitted = True
             return None
 
+        # Parsing resolves each new path with realpath, so keep it off the loop.
+        entries = await asyncio.to_thread(self._parse_lsof_output, stdout)
+
         if self._last_warning_emitted:
             self._last_warning_emitted = False
 
-        entries: Dict[str, Dict[str, Optional[str]]] = {}
-
-        for line in result.stdout.splitlines():
-            if not line or not line.startswith('n'):
-                continue
-            raw_path = line[1:].strip()
-            if not raw_path:
-                continue
-            abs_path = Path(raw_path)
-            try:
-                abs_path = abs_path.resolve(strict=False)
-            except OSError:
-                continue
-            if not _is_path_within_root(abs_path):
-                continue
-            try:
-                client_path = _absolute_to_client_path(abs_path)
-            except HTTPException:
-                continue
-
-            resolved_path = abs_path
-            try:
-                resolved_path = abs_path.resolve(strict=False)
-            except OSError:
-                resolved_path = abs_path
-            resolved_client: Optional[str] = None
-            if _is_path_within_root(resolved_path):
-                try:
-                    resolved_client = _absolute_to_client_path(resolved_path)
-                except HTTPException:
-                    resolved_client = None
-
-            slot = entries.setdefault(client_path, {"resolved_path": resolved_client})
-            if resolved_client and not slot.get("resolved_path"):
-                slot["resolved_path"] = resolved_client
-
+        # Every field comes from our own parsing, so skip pydantic validation;
+        # the frozen placeholder process can be shared by all entries.
+        process = OpenFileProcess.model_construct(pid=-1, command="")
         snapshot: Dict[str, OpenFileEntry] = {}
-        for client_path, info in entries.items():
-            process = OpenFileProcess(pid=-1, command="")
-            snapshot[client_path] = OpenFileEntry(
+        for client_path in entries:
+            snapshot[client_path] = OpenFileEntry.model_construct(
                 path=client_path,
-                resolved_path=info.get("resolved_path"),
+                resolved_path=client_path,
                 processes=[process]
             )
 
         return snapshot
 
 
+@functools.lru_cache(maxsize=4)
+def _lsof_root_line_re(root: str) -> "re.Pattern[bytes]":
+    """Match `lsof -Fn` name lines for paths at or below root."""
+    if root == os.sep:
+        return re.compile(rb"^n(/.*)$", re.MULTILINE)
+    prefix = re.escape(os.fsencode(root))
+    return re.compile(rb"^n(" + prefix + rb"(?:/.*)?)$", re.MULTILINE)
+
+
 def ensure_process_monitor() -> Optional[LsofMonitor]:
     """Create or reuse the background lsof monitor when process tracking is enabled."""
     global PROCESS_MONITOR
@@ -322,44 +470,68 @@ def get_process_monitor() -> Optional[LsofMonitor]:
     return PROCESS_MONITOR
 
 
-def stop_process_monitor() -> None:
+async def stop_process_monitor() -> None:
     global PROCESS_MONITOR
     monitor = PROCESS_MONITOR
-    if monitor:
-        monitor.stop()
     PROCESS_MONITOR = None
+    if monitor:
+        await monitor.stop()
 
 
-def _is_path_within_root(path: Path) -> bool:
-    try:
-        path.resolve(strict=False).relative_to(ROOT_DIR)
-        return True
-    except ValueError:
-        return False
+def _is_path_within_root(resolved: str) -> bool:
+    """Check that a path returned by os.path.realpath lies inside ROOT_DIR.
+
+    realpath output is already absolute and normalised, so a plain string
+    prefix test is sufficient.
+    """
+    return resolved == ROOT_DIR_STR or resolved.startswith(ROOT_DIR_PREFIX)
+
+
+def _resolved_to_client_path(resolved: str) -> str:
+    """Map a resolved absolute path already known to be inside ROOT_DIR to a client path."""
+    if resolved == ROOT_DIR_STR:
+        return "/"
+    relative = resolved[len(ROOT_DIR_PREFIX):]
+    return relative if os.sep == "/" else relative.replace(os.sep, "/")
 
 
 FAVOURITES_FILE = Path("data/favourites.json")
 FAVOURITES_LOCK = Lock()
+# (mtime_ns, favourite set, sorted favourites, version) parsed from
+# FAVOURITES_FILE. The tuple is swapped wholesale by writers, so readers can use
+# it without locking; version goes up by one on every swap.
+_FAV_STATE: Tuple[int, FrozenSet[str], Tuple[str, ...], int] = (-1, frozenset(), (), 0)
+
+
+_BACKSLASH_TRANS = str.maketrans("\\", "/")
+_SEPARATOR_RE = re.compile(r"/+")
+_DRIVE_RE = re.compile(r"[A-Za-z]:")
+_ROOT_RELATIVE = Path()
+# Linux PATH_MAX. Longer names cannot be opened anyway, and keeping them out
+# stops clients from filling the path caches with arbitrarily large keys.
+PATH_MAX = 4096
 
 
 def _normalize_relative_path(value: Optional[str]) -> Path:
-    if value is None:
-        return Path()
-    text = str(value).strip()
-    if text in {"", ".", "./"}:
-        return Path()
-    text = text.replace("\\", "/")
-    if text in {"/", "./", "."}:
-        return Path()
-    if len(text) >= 2 and text[1] == ':' and text[0].isalpha():
+    # The root is by far the most common argument; skip the cache for it.
+    if value is None or value == "" or value == "/":
+        return _ROOT_RELATIVE
+    value = str(value)
+    if len(value) > PATH_MAX:
+        raise HTTPException(status_code=400, detail="Path too long")
+    return _normalize_relative_text(value)
+
+
+# Rejected paths raise, and lru_cache stores no entry for them, so only
+# valid paths take up cache slots.
+@functools.lru_cache(maxsize=8192)
+def _normalize_relative_text(value: str) -> Path:
+    text = value.strip().translate(_BACKSLASH_TRANS)
+    if _DRIVE_RE.match(text):
         raise HTTPException(status_code=400, detail="Invalid path")
-    if text.startswith("/"):
-        text = text.lstrip("/")
-        if not text:
-            return Path()
     parts: List[str] = []
-    for part in text.split('/'):
-        if part in ("", "."):
+    for part in _SEPARATOR_RE.split(text):
+        if not part or part == ".":
             continue
         if part == "..":
             if not parts:
@@ -378,67 +550,163 @@ def _relative_path_to_string(path: Path) -> str:
 
 def _client_path_to_absolute(value: Optional[str]) -> Path:
     relative_path = _normalize_relative_path(value)
-    absolute = (ROOT_DIR / relative_path).resolve(strict=False)
-    if not _is_path_within_root(absolute):
+    resolved = os.path.realpath(os.path.join(ROOT_DIR_STR, *relative_path.parts))
+    if not _is_path_within_root(resolved):
         raise HTTPException(status_code=403, detail="Access outside the configured root directory is denied")
-    return absolute
+    return Path(resolved)
 
 
-def _absolute_to_client_path(path: Path) -> str:
-    resolved = path.resolve(strict=False)
-    if not _is_path_within_root(resolved):
+def _absolute_to_client_path(path: Union[str, Path]) -> str:
+    client_path = _cached_client_path(os.fspath(path), int(time.monotonic() // STAT_CACHE_TTL))
+    if client_path is None:
         raise HTTPException(status_code=403, detail="Access outside the configured root directory is denied")
+    return client_path
+
+
+@functools.lru_cache(maxsize=4096)
+def _cached_client_path(path_str: str, ttl_bucket: int) -> Optional[str]:
+    """Resolve an absolute path to its client path, or None if it leaves the root.
+
+    Symlink targets can change, so results expire with the ttl_bucket key.
+    """
     try:
-        relative = resolved.relative_to(ROOT_DIR)
-    except ValueError as exc:
-        raise HTTPException(status_code=403, detail="Access outside the configured root directory is denied") from exc
-    return _relative_path_to_string(relative)
+        resolved = os.path.realpath(path_str)
+    except (OSError, ValueError):
+        return None
+    if not _is_path_within_root(resolved):
+        return None
+    return _resolved_to_client_path(resolved)
+
+
+def _child_client_prefix(parent_client: str) -> str:
+    """Prefix that turns a child's name into its client path under parent_client."""
+    return "" if parent_client == "/" else f"{parent_client.rstrip('/')}/"
 
 
 def ensure_favourites_file() -> None:
     FAVOURITES_FILE.parent.mkdir(parents=True, exist_ok=True)
     if not FAVOURITES_FILE.exists():
-        with FAVOURITES_FILE.open("w", encoding="utf-8") as fh:
-            json.dump([], fh)
+        FAVOURITES_FILE.write_bytes(orjson.dumps([]))
 
 
-def load_favourites() -> List[str]:
-    ensure_favourites_file()
-    with FAVOURITES_LOCK:
+def _read_favourites_file() -> List[str]:
+    try:
+        data = orjson.loads(FAVOURITES_FILE.read_bytes())
+    except orjson.JSONDecodeError:
+        return []
+    if not isinstance(data, list):
+        return []
+    return _sanitize_favourites(data)
+
+
+def _sanitize_favourites(items: Iterable[object]) -> List[str]:
+    """Normalise entries to client path strings, dropping invalid ones and repeats."""
+    favourites: List[str] = []
+    seen: Set[str] = set()
+    for item in items:
         try:
-            with FAVOURITES_FILE.open("r", encoding="utf-8") as fh:
-                data = json.load(fh)
-                if not isinstance(data, list):
-                    return []
-                favourites: List[str] = []
-                for item in data:
-                    try:
-                        relative = _normalize_relative_path(str(item))
-                    except HTTPException:
-                        continue
-                    entry = _relative_path_to_string(relative)
-                    if entry not in favourites:
-                        favourites.append(entry)
-                return favourites
-        except json.JSONDecodeError:
-            return []
+            entry = _relative_path_to_string(_normalize_relative_path(str(item)))
+        except HTTPException:
+            continue
+        if entry not in seen:
+            seen.add(entry)
+            favourites.append(entry)
+    return favourites
+
+
+def _favourites_mtime_ns() -> int:
+    try:
+        return os.stat(FAVOURITES_FILE).st_mtime_ns
+    except FileNotFoundError:
+        ensure_favourites_file()
+        return os.stat(FAVOURITES_FILE).st_mtime_ns
+
+
+def _load_favourites_state() -> Tuple[int, FrozenSet[str], Tuple[str, ...], int]:
+    global _FAV_STATE
+    state = _FAV_STATE
+    if _favourites_mtime_ns() == state[0]:
+        return state
+    with FAVOURITES_LOCK:
+        mtime_ns = _favourites_mtime_ns()
+        state = _FAV_STATE
+        if mtime_ns != state[0]:
+            favourites = _read_favourites_file()
+            state = (mtime_ns, frozenset(favourites), tuple(favourites), state[3] + 1)
+            _FAV_STATE = state
+        return state
+
+
+def load_favourites() -> Tuple[str, ...]:
+    """Return the cached favourites in sorted order; the tuple is shared, not copied."""
+    return _load_favourites_state()[2]
+
+
+def load_favourite_set() -> FrozenSet[str]:
+    """Return the cached favourites as a frozenset for membership checks."""
+    return _load_favourites_state()[1]
+
+
+def load_favourites_versioned() -> Tuple[int, FrozenSet[str]]:
+    """Return (version, favourite set) taken from the same cached state."""
+    state = _load_favourites_state()
+    return state[3], state[1]
 
 
 def save_favourites(paths: List[str]) -> None:
-    ensure_favourites_file()
+    global _FAV_STATE
+    sanitized = _sanitize_favourites(paths)
+    sanitized.sort()
+    payload = orjson.dumps(sanitized, option=orjson.OPT_INDENT_2)
+    state_set = frozenset(sanitized)
+    state_order = tuple(sanitized)
+
+    FAVOURITES_FILE.parent.mkdir(parents=True, exist_ok=True)
+    temp_file = FAVOURITES_FILE.with_name(f"{FAVOURITES_FILE.name}.tmp")
+    # Only the file swap and state update are serialized; os.replace keeps
+    # readers from ever seeing a partially written file.
     with FAVOURITES_LOCK:
-        sanitized: List[str] = []
-        for path in paths:
-            try:
-                relative = _normalize_relative_path(path)
-            except HTTPException:
-                continue
-            entry = _relative_path_to_string(relative)
-            if entry not in sanitized:
-                sanitized.append(entry)
-        sanitized.sort()
-        with FAVOURITES_FILE.open("w", encoding="utf-8") as fh:
-            json.dump(sanitized, fh, indent=2)
+        try:
+            temp_file.write_bytes(payload)
+            os.replace(temp_file, FAVOURITES_FILE)
+        except OSError:
+            # Don't leave a half-written temp file behind (e.g. on ENOSPC).
+            temp_file.unlink(missing_ok=True)
+            raise
+        _FAV_STATE = (_favourites_mtime_ns(), state_set, state_order, _FAV_STATE[3] + 1)
+
+
+_EUID = os.geteuid() if hasattr(os, "geteuid") else None
+_EGIDS = frozenset({os.getegid(), *os.getgroups()}) if hasattr(os, "getegid") else frozenset()
+
+
+def _is_readable(stat_info: os.stat_result, path: str) -> bool:
+    """Derive read permission from mode bits, deferring to os.access when unsure."""
+    if _EUID is None or _EUID == 0:
+        return os.access(path, os.R_OK)
+    mode = stat_info.st_mode
+    if stat_info.st_uid == _EUID:
+        allowed = mode & stat.S_IRUSR
+    elif stat_info.st_gid in _EGIDS:
+        allowed = mode & stat.S_IRGRP
+    else:
+        allowed = mode & stat.S_IROTH
+    # ACLs can grant access that the mode bits do not show, so confirm denials.
+    return bool(allowed) or os.access(path, os.R_OK)
+
+
+@functools.lru_cache(maxsize=2048)
+def _stat_cached(path_str: str, ttl_bucket: int) -> Optional[Tuple[bool, bool]]:
+    """Return (is_directory, readable) for a path, or None if it cannot be stat'ed.
+
+    ttl_bucket is part of the cache key only, so both hits and misses expire
+    once the monotonic clock moves into the next STAT_CACHE_TTL window.
+    """
+    try:
+        stat_info = os.stat(path_str)
+    except OSError:
+        return None
+    return stat.S_ISDIR(stat_info.st_mode), os.access(path_str, os.R_OK)
 
 
 def get_safe_path(requested_path: Optional[str]) -> Path:
@@ -453,37 +721,120 @@ def get_safe_path(requested_path: Optional[str]) -> Path:
     except (OSError, ValueError) as exc:
         raise HTTPException(status_code=400, detail=f"Invalid path: {str(exc)}") from exc
 
-    if not resolved_path.exists():
+    path_str = os.fspath(resolved_path)
+    # os.stat fails with ENAMETOOLONG past PATH_MAX, so answer without caching
+    # a miss under an oversized key.
+    if len(path_str) > PATH_MAX:
+        raise HTTPException(status_code=404, detail="Path not found")
+    status = _stat_cached(path_str, int(time.monotonic() // STAT_CACHE_TTL))
+    if status is None:
         raise HTTPException(status_code=404, detail="Path not found")
 
-    if not os.access(resolved_path, os.R_OK):
+    if not status[1]:
         raise HTTPException(status_code=403, detail="Access denied")
 
     return resolved_path
 
 
-def get_hex_preview(file_path: Path, max_bytes: int = 256) -> Optional[List[HexLine]]:
+def _validated_stat(requested_path: Optional[str]) -> Tuple[Path, os.stat_result]:
+    """Run get_safe_path and stat its result in one go.
+
+    Both touch the filesystem (realpath lstat's every path component), so
+    routes call this through a single asyncio.to_thread hop. Raises
+    HTTPException like get_safe_path, or OSError when the final stat fails.
+    """
+    safe_path = get_safe_path(requested_path)
+    return safe_path, os.stat(safe_path)
+
+
+def _directory_or_400(requested_path: Optional[str]) -> Tuple[Path, os.stat_result]:
+    """_validated_stat for routes that only accept directories"""
+    try:
+        safe_path, stat_info = _validated_stat(requested_path)
+    except OSError:
+        raise HTTPException(status_code=400, detail="Path is not a directory")
+    if not stat.S_ISDIR(stat_info.st_mode):
+        raise HTTPException(status_code=400, detail="Path is not a directory")
+    return safe_path, stat_info
+
+
+def _regular_file_or_400(requested_path: Optional[str]) -> Tuple[Path, os.stat_result]:
+    """_validated_stat for routes that only accept regular files"""
+    try:
+        safe_path, stat_info = _validated_stat(requested_path)
+    except OSError:
+        raise HTTPException(status_code=400, detail="Path is not a file")
+    if not stat.S_ISREG(stat_info.st_mode):
+        raise HTTPException(status_code=400, detail="Path is not a file")
+    return safe_path, stat_info
+
+
+_HEX_OPEN_FLAGS = (
+    os.O_RDONLY
+    | getattr(os, "O_NOFOLLOW", 0)
+    | getattr(os, "O_NONBLOCK", 0)
+    | getattr(os, "O_CLOEXEC", 0)
+)
+# Skips the atime update that would otherwise turn each preview into a write.
+_O_NOATIME = getattr(os, "O_NOATIME", 0)
+
+# Maps printable ASCII bytes to themselves and everything else to ".".
+_ASCII_TABLE = bytes(byte if 32 <= byte < 127 else 0x2E for byte in range(256))
+
+
+def get_hex_preview(
+    file_path: Path,
+    max_bytes: int = 256,
+    stat_info: Optional[os.stat_result] = None
+) -> Optional[List[HexLine]]:
     """
     Generate structured hex dump preview of file for texture generation.
     Returns list of offset/hex/ascii rows for the first max_bytes of the file.
+
+    Pass ``stat_info`` when the caller already stat'ed the path to skip a
+    second stat.
     """
     try:
-        if not file_path.is_file():
+        path_str = os.fspath(file_path)
+        # Opening is itself a side effect for FIFOs (it releases a blocked
+        # writer) and device nodes (tapes rewind on close), so only regular
+        # files are ever opened.
+        if stat_info is None:
+            stat_info = os.stat(path_str)
+        if not stat.S_ISREG(stat_info.st_mode):
             return None
 
-        with open(file_path, "rb") as f:
-            data = f.read(max_bytes)
-
+        # A raw descriptor skips the BufferedReader setup for this one small read.
+        # O_NONBLOCK keeps the open from hanging and fstat rejects the file if it
+        # was swapped for something else after the stat above.
+        try:
+            fd = os.open(path_str, _HEX_OPEN_FLAGS | _O_NOATIME)
+        except PermissionError:
+            # O_NOATIME is refused with EPERM for files we do not own.
+            if not _O_NOATIME:
+                raise
+            fd = os.open(path_str, _HEX_OPEN_FLAGS)
+        try:
+            if not stat.S_ISREG(os.fstat(fd).st_mode):
+                return None
+            data = os.read(fd, max(0, max_bytes))
+        finally:
+            os.close(fd)
+
+        # Convert the whole buffer once, then slice rows: every byte is "xx " in
+        # hex_text, so a full 16-byte row is exactly 47 characters wide.
+        hex_text = data.hex(" ")
+        ascii_text = data.translate(_ASCII_TABLE).decode("ascii")
         hex_lines: List[HexLine] = []
         for offset in range(0, len(data), 16):
-            chunk = data[offset : offset + 16]
-            hex_part = " ".join(f"{byte:02x}" for byte in chunk)
-            ascii_part = "".join(chr(byte) if 32 <= byte < 127 else "." for byte in chunk)
+            hex_part = hex_text[offset * 3 : offset * 3 + 47]
+            if len(hex_part) < 47:
+                hex_part = hex_part.ljust(47)
             hex_lines.append(
-                HexLine(
+                HexLine.model_construct(
                     offset=f"{offset:08x}",
-                    hex=hex_part.ljust(47),
-                    ascii=ascii_part,
+                    hex=hex_part,
+                    ascii=ascii_text[offset : offset + 16],
                 )
             )
 
@@ -493,21 +844,55 @@ def get_hex_preview(file_path: Path, max_bytes: int = 256) -> Optional[List[HexL
         return None
 
 
+_LOG_SCALE = 1.0 / 2.0
+_log10 = math.log10
+
+
 def calculate_log_size(size: int) -> float:
     """
     Calculate log-normalized file size for building height.
     Returns value between 0.1 and 10.0 for visual scaling.
     """
-    if size <= 0:
+    if size <= 1:
         return 0.1
-    
+
     # Log base 10 with some scaling for visual appeal
-    log_size = math.log10(max(1, size))
+    log_size = _log10(size) * _LOG_SCALE
     # Normalize to reasonable building heights (0.1 to 10.0 units)
-    normalized = max(0.1, min(10.0, log_size / 2.0))
-    return normalized
+    return 0.1 if log_size < 0.1 else (10.0 if log_size > 10.0 else log_size)
 
 
+# Load the system MIME tables up front instead of on the first listing request.
+mimetypes.init()
+
+
+@functools.lru_cache(maxsize=4096)
+def _mime_for_suffix(suffix: str) -> Optional[str]:
+    return mimetypes.guess_type("x" + suffix)[0]
+
+
+def _guess_mime_type(name: str) -> Optional[str]:
+    """Guess a MIME type from a file name, memoized on its suffix."""
+    # Same split as os.path.splitext, without its per-call generality: leading
+    # dots (".bashrc", "..x") do not start an extension.
+    dot = name.rfind(".")
+    if dot <= 0 or (name[0] == "." and not name[:dot].strip(".")):
+        return None
+    # The suffix keeps its case: the mimetypes tables hold case-sensitive keys
+    # (".Z" compression, ".SAR" and friends), and guess_type already falls
+    # back to lowercase where that is right.
+    suffix = name[dot:]
+    lowered = suffix.lower()
+    if (
+        suffix in mimetypes.suffix_map
+        or suffix in mimetypes.encodings_map
+        or lowered in mimetypes.suffix_map
+        or lowered in mimetypes.encodings_map
+    ):
+        # Compound suffixes such as .tar.gz resolve through the inner extension.
+        suffix = os.path.splitext(name[:dot])[1] + suffix
+    return _mime_for_suffix(suffix)
+
 
 def list_open_files_for_directory(directory: Path) -> List[OpenFileEntry]:
     """Return cached open file entries for the given directory."""
@@ -517,6 +902,361 @@ def list_open_files_for_directory(directory: Path) -> List[OpenFileEntry]:
     return monitor.get_entries_for_directory(directory)
 
 
+def _is_readable_by_inode(
+    stat_info: os.stat_result,
+    path: str,
+    known: Dict[Tuple[int, int], bool]
+) -> bool:
+    """_is_readable, remembered per inode so hard links are checked only once."""
+    if stat_info.st_nlink < 2:
+        return _is_readable(stat_info, path)
+    key = (stat_info.st_dev, stat_info.st_ino)
+    readable = known.get(key)
+    if readable is None:
+        readable = known[key] = _is_readable(stat_info, path)
+    return readable
+
+
+def _build_listing_item(
+    entry: os.DirEntry,
+    child_prefix: str,
+    favourite_paths: FrozenSet[str],
+    in_proc: bool,
+    readable_by_inode: Dict[Tuple[int, int], bool]
+) -> Optional[FileInfoDict]:
+    """Describe one scandir entry, or return None when it should be skipped."""
+    try:
+        try:
+            stat_info = entry.stat()
+        except OSError:
+            if not entry.is_symlink():
+                raise
+            return _broken_link_item(entry, child_prefix, favourite_paths)
+        if entry.is_symlink():
+            try:
+                client_path = _absolute_to_client_path(entry.path)
+            except HTTPException as exc:
+                if exc.status_code == 403:
+                    return None
+                raise
+            in_proc = client_path.startswith("proc/")
+        else:
+            client_path = child_prefix + entry.name
+
+        mode = stat_info.st_mode
+        is_directory = stat.S_ISDIR(mode)
+        preview_available = True
+        preview_unavailable_reason: Optional[str] = None
+        if is_directory:
+            preview_available = True
+        elif not stat.S_ISREG(mode):
+            preview_available = False
+            preview_unavailable_reason = "Unsupported file type"
+        elif not _is_readable_by_inode(stat_info, entry.path, readable_by_inode):
+            preview_available = False
+            preview_unavailable_reason = "Permission denied"
+
+        if in_proc and preview_available and not is_directory:
+            preview_available = False
+            preview_unavailable_reason = "Ephemeral process file"
+
+        # Values come straight from our own stat results, so skip model validation.
+        return {
+            "name": entry.name,
+            "path": client_path,
+            "is_directory": is_directory,
+            "size": stat_info.st_size if not is_directory else 0,
+            "modified": stat_info.st_mtime,
+            "mime_type": _guess_mime_type(entry.name) if not is_directory else None,
+            "log_size": calculate_log_size(stat_info.st_size) if not is_directory else 1.0,
+            "hex_preview": None,
+            "is_favourite": client_path in favourite_paths,
+            "preview_available": preview_available,
+            "preview_unavailable_reason": preview_unavailable_reason,
+        }
+
+    except (OSError, PermissionError):
+        # Skip files we can't access
+        return None
+
+
+def _broken_link_item(
+    entry: os.DirEntry,
+    child_prefix: str,
+    favourite_paths: FrozenSet[str]
+) -> Optional[FileInfoDict]:
+    """Describe a symlink whose target is missing or loops, so it still shows up."""
+    # Dangling links aimed outside the root stay hidden, like live ones.
+    if _cached_client_path(entry.path, int(time.monotonic() // STAT_CACHE_TTL)) is None:
+        return None
+    link_stat = entry.stat(follow_symlinks=False)
+    client_path = child_prefix + entry.name
+    return {
+        "name": entry.name,
+        "path": client_path,
+        "is_directory": False,
+        "size": 0,
+        "modified": link_stat.st_mtime,
+        "mime_type": None,
+        "log_size": calculate_log_size(0),
+        "hex_preview": None,
+        "is_favourite": client_path in favourite_paths,
+        "preview_available": False,
+        "preview_unavailable_reason": "Broken symbolic link",
+    }
+
+
+def _browse_cache_drop(key: Tuple[str, str]) -> None:
+    """Remove one entry; the caller holds BROWSE_CACHE_LOCK."""
+    global _BROWSE_CACHE_BYTES
+    _BROWSE_CACHE_BYTES -= len(BROWSE_CACHE.pop(key)[2])
+
+
+def _browse_cache_get(key: Tuple[str, str], validity: Tuple[int, int]) -> Optional[Tuple[bytes, str]]:
+    with BROWSE_CACHE_LOCK:
+        cached = BROWSE_CACHE.get(key)
+        if cached is None:
+            return None
+        created, cached_validity, body, etag = cached
+        if cached_validity != validity or time.monotonic() - created > BROWSE_CACHE_TTL:
+            _browse_cache_drop(key)
+            return None
+        BROWSE_CACHE.move_to_end(key)
+        return body, etag
+
+
+def _browse_cache_put(key: Tuple[str, str], validity: Tuple[int, int], body: bytes, etag: str) -> None:
+    global _BROWSE_CACHE_BYTES
+    with BROWSE_CACHE_LOCK:
+        if key in BROWSE_CACHE:
+            _browse_cache_drop(key)
+        now = time.monotonic()
+        expired = [k for k, v in BROWSE_CACHE.items() if now - v[0] > BROWSE_CACHE_TTL]
+        for expired_key in expired:
+            _browse_cache_drop(expired_key)
+        if len(body) > BROWSE_CACHE_MAX_BYTES:
+            return
+        BROWSE_CACHE[key] = (now, validity, body, etag)
+        _BROWSE_CACHE_BYTES += len(body)
+        while (
+            len(BROWSE_CACHE) > BROWSE_CACHE_MAX_ENTRIES
+            or _BROWSE_CACHE_BYTES > BROWSE_CACHE_MAX_BYTES
+        ):
+            _browse_cache_drop(next(iter(BROWSE_CACHE)))
+
+
+def _file_info_cache_get(key: tuple) -> Optional[FileInfo]:
+    with FILE_INFO_CACHE_LOCK:
+        file_info = FILE_INFO_CACHE.get(key)
+        if file_info is not None:
+            FILE_INFO_CACHE.move_to_end(key)
+        return file_info
+
+
+def _file_info_cache_put(key: tuple, file_info: FileInfo) -> None:
+    with FILE_INFO_CACHE_LOCK:
+        FILE_INFO_CACHE[key] = file_info
+        FILE_INFO_CACHE.move_to_end(key)
+        while len(FILE_INFO_CACHE) > FILE_INFO_CACHE_MAX_ENTRIES:
+            FILE_INFO_CACHE.popitem(last=False)
+
+
+def _etag_for_body(body: bytes) -> str:
+    return '"%s"' % hashlib.blake2b(body, digest_size=8).hexdigest()
+
+
+def _etag_for_stat(stat_info: os.stat_result, *variant: object) -> str:
+    """Validator for a file response, derived from stat() before any read"""
+    token = ":".join(str(part) for part in (
+        stat_info.st_dev, stat_info.st_ino, stat_info.st_size, stat_info.st_mtime_ns, *variant
+    ))
+    return '"%s"' % hashlib.blake2b(token.encode(), digest_size=8).hexdigest()
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 requires for If-None-Match.
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in header.split(","))
+
+
+def _cache_headers(etag: str, mtime: Optional[float] = None) -> Dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": HTTP_CACHE_CONTROL}
+    if mtime is not None:
+        headers["Last-Modified"] = formatdate(mtime, usegmt=True)
+    return headers
+
+
+def _listing_sort_key(name: str) -> Tuple[str, str]:
+    return name.lower(), name
+
+
+def _entry_stat_or_none(entry: os.DirEntry) -> Optional[os.stat_result]:
+    try:
+        return entry.stat()
+    except OSError:
+        return None
+
+
+def _entry_size_key(entry: os.DirEntry) -> Tuple[int, str, str]:
+    stat_info = _entry_stat_or_none(entry)
+    size = 0 if stat_info is None or stat.S_ISDIR(stat_info.st_mode) else stat_info.st_size
+    return (size,) + _listing_sort_key(entry.name)
+
+
+def _entry_mtime_key(entry: os.DirEntry) -> Tuple[float, str, str]:
+    stat_info = _entry_stat_or_none(entry)
+    return (0.0 if stat_info is None else stat_info.st_mtime,) + _listing_sort_key(entry.name)
+
+
+# DirEntry caches its stat result, so size/mtime ordering reuses the stat that
+# the listing itself needs anyway.
+LISTING_ORDERS = {
+    "name": lambda entry: _listing_sort_key(entry.name),
+    "size": _entry_size_key,
+    "mtime": _entry_mtime_key,
+}
+
+
+def _select_page(
+    entries: Iterable[os.DirEntry],
+    limit: Optional[int],
+    cursor: Optional[str],
+    offset: int = 0,
+    order_by: str = "name"
+) -> Tuple[List[os.DirEntry], Optional[str], bool, int]:
+    """Pick one page of entries in the requested order.
+
+    Returns the page, the cursor for the next page (name order only), whether
+    more entries follow, and the number of entries in the directory.
+    """
+    total = 0
+
+    def _counted(source: Iterable[os.DirEntry]) -> Iterator[os.DirEntry]:
+        nonlocal total
+        for entry in source:
+            total += 1
+            yield entry
+
+    sort_key = LISTING_ORDERS[order_by]
+    candidates: Iterable[os.DirEntry] = _counted(entries)
+    if cursor is not None:
+        after = _listing_sort_key(cursor)
+        candidates = (entry for entry in candidates if _listing_sort_key(entry.name) > after)
+    if limit is None:
+        return sorted(candidates, key=sort_key)[offset:], None, False, total
+    # Only the smallest offset + limit + 1 keys are kept, so large directories
+    # are never fully sorted.
+    window = heapq.nsmallest(offset + limit + 1, candidates, key=sort_key)
+    page = window[offset:offset + limit]
+    has_more = len(window) > offset + limit
+    next_cursor = page[-1].name if has_more and page and order_by == "name" else None
+    return page, next_cursor, has_more, total
+
+
+def _close_entries(entries: Iterable[os.DirEntry]) -> None:
+    close = getattr(entries, "close", None)
+    if close is not None:
+        close()
+
+
+def _open_listing(
+    directory: Path,
+    paged: bool,
+    limit: Optional[int],
+    cursor: Optional[str],
+    offset: int,
+    order_by: str
+) -> Tuple[Iterable[os.DirEntry], Optional[str], bool, Optional[int]]:
+    """Open a directory for listing and, when paged, select the requested window.
+
+    Returns the entries to describe along with next_cursor, has_more and total.
+    """
+    try:
+        # DirEntry caches the readdir type and a single stat, so each child costs
+        # at most one stat syscall instead of one per pathlib predicate.
+        entries = os.scandir(directory)
+    except (OSError, PermissionError) as e:
+        raise HTTPException(status_code=403, detail=f"Cannot access directory: {str(e)}")
+
+    if not paged:
+        return entries, None, False, None
+    try:
+        with entries:
+            return _select_page(entries, limit, cursor, offset, order_by)
+    except (OSError, PermissionError) as e:
+        raise HTTPException(status_code=403, detail=f"Cannot access directory: {str(e)}")
+
+
+def _collect_listing(
+    entries: Iterable[os.DirEntry],
+    child_prefix: str,
+    favourite_paths: FrozenSet[str]
+) -> List[FileInfoDict]:
+    try:
+        return list(_scan_directory(entries, child_prefix, favourite_paths))
+    except (OSError, PermissionError) as e:
+        raise HTTPException(status_code=403, detail=f"Cannot access directory: {str(e)}")
+    finally:
+        _close_entries(entries)
+
+
+def _read_listing(
+    directory: Path,
+    paged: bool,
+    limit: Optional[int],
+    cursor: Optional[str],
+    offset: int,
+    order_by: str,
+    child_prefix: str,
+    favourite_paths: FrozenSet[str]
+) -> Tuple[List[FileInfoDict], Optional[str], bool, Optional[int]]:
+    """Open, page and describe a directory within one worker call.
+
+    Keeping the whole scan in one call means the directory descriptor never
+    outlives it, even if the awaiting request is cancelled.
+    """
+    entries, next_cursor, has_more, total = _open_listing(
+        directory, paged, limit, cursor, offset, order_by
+    )
+    return _collect_listing(entries, child_prefix, favourite_paths), next_cursor, has_more, total
+
+
+def _scan_directory(
+    entries: Iterable[os.DirEntry],
+    child_prefix: str,
+    favourite_paths: FrozenSet[str]
+) -> Iterator[FileInfoDict]:
+    # Anything below a top-level "proc" directory is treated as ephemeral.
+    in_proc = child_prefix.startswith("proc/")
+    # Hard links share permissions, so each inode's access check runs once.
+    readable_by_inode: Dict[Tuple[int, int], bool] = {}
+    for entry in entries:
+        file_info = _build_listing_item(entry, child_prefix, favourite_paths, in_proc, readable_by_inode)
+        if file_info is not None:
+            yield file_info
+
+
+def _stream_listing(
+    header: Dict[str, object],
+    entries: Iterable[os.DirEntry],
+    child_prefix: str,
+    favourite_paths: FrozenSet[str]
+) -> Iterator[bytes]:
+    try:
+        yield orjson.dumps(header) + b"\n"
+        for file_info in _scan_directory(entries, child_prefix, favourite_paths):
+            yield orjson.dumps(file_info) + b"\n"
+    except OSError:
+        # Headers are already sent, so a failing directory read just ends the stream.
+        return
+    finally:
+        _close_entries(entries)
+
+
 @app.get("/")
 async def root():
     """Serve the main 3D interface"""
@@ -529,135 +1269,208 @@ async def get_capabilities() -> CapabilityResponse:
     return CapabilityResponse(lsof_available=LSOF_ENABLED)
 
 
-@app.get("/api/browse")
-async def browse_directory(path: str = None) -> DirectoryListing:
+@app.get("/api/browse", response_model=None, responses={200: {"model": DirectoryListing}})
+async def browse_directory(
+    request: Request,
+    path: str = None,
+    stream: bool = False,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    offset: int = 0,
+    order_by: Optional[str] = None
+) -> Response:
     """
     Browse directory contents for 3D visualization
+
+    With ``stream=true`` the listing is sent as NDJSON: a first line holding
+    the DirectoryListing fields other than ``items``, followed by one FileInfo
+    object per line.
+
+    Passing ``limit``, ``cursor``, ``offset`` or ``order_by`` (``name``,
+    ``size`` or ``mtime``; default ``name``) returns a sorted window of the
+    directory with ``has_more`` and ``total`` filled in. ``next_cursor`` is set
+    while name-ordered entries remain. Without them every entry is returned in
+    directory order.
     """
     relative_path = _normalize_relative_path(path)
-    safe_path = get_safe_path(path)
-    
-    if not safe_path.is_dir():
-        raise HTTPException(status_code=400, detail="Path is not a directory")
-    
-    items = []
-    favourite_paths = set(load_favourites())
-    
-    try:
-        for item in safe_path.iterdir():
-            try:
-                stat_info = item.stat()
-                try:
-                    client_path = _absolute_to_client_path(item)
-                except HTTPException as exc:
-                    if exc.status_code == 403:
-                        continue
-                    raise
-
-                readable = os.access(item, os.R_OK)
-                is_regular_file = item.is_file()
-                preview_available = True
-                preview_unavailable_reason: Optional[str] = None
-                if item.is_dir():
-                    preview_available = True
-                elif not is_regular_file:
-                    preview_available = False
-                    preview_unavailable_reason = "Unsupported file type"
-                elif not readable:
-                    preview_available = False
-                    preview_unavailable_reason = "Permission denied"
-
-                if preview_available and not item.is_dir():
-                    first_segment = client_path.split('/', 1)[0]
-                    if first_segment == "proc":
-                        preview_available = False
-                        preview_unavailable_reason = "Ephemeral process file"
-                
-                # Get file info
-                file_info = FileInfo(
-                    name=item.name,
-                    path=client_path,
-                    is_directory=item.is_dir(),
-                    size=stat_info.st_size if not item.is_dir() else 0,
-                    modified=stat_info.st_mtime,
-                    log_size=calculate_log_size(stat_info.st_size) if not item.is_dir() else 1.0,
-                    mime_type=mimetypes.guess_type(str(item))[0] if not item.is_dir() else None,
-                    is_favourite=client_path in favourite_paths,
-                    preview_available=preview_available,
-                    preview_unavailable_reason=preview_unavailable_reason
-                )
-                
-                items.append(file_info)
-                
-            except (OSError, PermissionError):
-                # Skip files we can't access
-                continue
-    
-    except (OSError, PermissionError) as e:
-        raise HTTPException(status_code=403, detail=f"Cannot access directory: {str(e)}")
+    # Path validation and the one stat that serves both the directory check and
+    # the listing cache key run off the event loop, like the scan itself.
+    safe_path, dir_stat = await asyncio.to_thread(_directory_or_400, path)
+
+    if limit is not None and limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be a positive integer")
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="offset must not be negative")
+    if order_by is not None and order_by not in LISTING_ORDERS:
+        raise HTTPException(status_code=400, detail=f"order_by must be one of: {', '.join(LISTING_ORDERS)}")
+    if cursor is not None and order_by not in (None, "name"):
+        raise HTTPException(status_code=400, detail="cursor paging requires name ordering")
     
+    favourites_version, favourite_paths = load_favourites_versioned()
+    # safe_path is already resolved and inside the root, so children that are
+    # not symlinks map to client paths by plain string joining.
+    parent_client = _resolved_to_client_path(os.fspath(safe_path))
+    child_prefix = _child_client_prefix(parent_client)
+
     # Get parent directory
     if not relative_path.parts:
         parent = None
     else:
         parent_path = Path(*relative_path.parts[:-1])
         parent = _relative_path_to_string(parent_path)
-    
-    return DirectoryListing(
-        path=_relative_path_to_string(relative_path),
-        parent=parent,
-        items=items
+    listing_path = _relative_path_to_string(relative_path)
+
+    paged = limit is not None or cursor is not None or offset > 0 or order_by is not None
+    cache_key = None
+    # The body (and so its ETag) carries the favourite flags; checking the
+    # version spares hashing and comparing the whole favourites set.
+    cache_validity = (dir_stat.st_mtime_ns, favourites_version)
+    if not stream and not paged and BROWSE_CACHE_TTL > 0:
+        cache_key = (listing_path, os.fspath(safe_path))
+        cached = _browse_cache_get(cache_key, cache_validity)
+        if cached is not None:
+            cached_body, etag = cached
+            if _etag_matches(request, etag):
+                return Response(status_code=304, headers=_cache_headers(etag))
+            return Response(content=cached_body, media_type="application/json", headers=_cache_headers(etag))
+
+    # Reading and stat'ing the directory happens in worker threads so a large or
+    # slow directory does not hold up other requests on the event loop.
+    if stream:
+        # The open iterator is handed to StreamingResponse, which consumes it
+        # in Starlette's threadpool and closes it when the stream ends.
+        entries, next_cursor, has_more, total = await asyncio.to_thread(
+            _open_listing, safe_path, paged, limit, cursor, offset, order_by or "name"
+        )
+        header = {
+            "path": listing_path,
+            "parent": parent,
+            "next_cursor": next_cursor,
+            "has_more": has_more,
+            "total": total,
+        }
+        return StreamingResponse(
+            _stream_listing(header, entries, child_prefix, favourite_paths),
+            media_type="application/x-ndjson"
+        )
+
+    items, next_cursor, has_more, total = await asyncio.to_thread(
+        _read_listing, safe_path, paged, limit, cursor, offset, order_by or "name",
+        child_prefix, favourite_paths
     )
 
+    # Encoded by hand to skip per-item validation; the shape matches DirectoryListing.
+    body = orjson.dumps({
+        "path": listing_path,
+        "parent": parent,
+        "items": items,
+        "next_cursor": next_cursor,
+        "has_more": has_more,
+        "total": total,
+    })
+    # The validator hashes the body itself: a directory's mtime does not move
+    # when a child file is rewritten in place, so it cannot stand in for one.
+    etag = _etag_for_body(body)
+    if cache_key is not None:
+        _browse_cache_put(cache_key, cache_validity, body, etag)
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=_cache_headers(etag))
+    return Response(content=body, media_type="application/json", headers=_cache_headers(etag))
+
 
 @app.get("/api/file-hex")
-async def fetch_file_hex(path: str, max_bytes: int = 256) -> HexPreview:
+async def fetch_file_hex(
+    request: Request,
+    response: Response,
+    path: str,
+    # Same cap as HexPreviewBatchRequest: os.read allocates the full size up front.
+    max_bytes: int = Query(256, ge=0, le=4096)
+) -> HexPreview:
     """Fetch structured hex dump lines for a file"""
     relative_path = _normalize_relative_path(path)
-    safe_path = get_safe_path(path)
+    # Path validation, stat and the read all run in worker threads so a slow
+    # mount cannot stall the event loop.
+    safe_path, stat_info = await asyncio.to_thread(_regular_file_or_400, path)
 
-    if not safe_path.is_file():
-        raise HTTPException(status_code=400, detail="Path is not a file")
+    headers = _cache_headers(_etag_for_stat(stat_info, max_bytes), stat_info.st_mtime)
+    if _etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
 
-    lines = get_hex_preview(safe_path, max_bytes=max_bytes)
+    lines = await asyncio.to_thread(get_hex_preview, safe_path, max_bytes, stat_info)
     if lines is None:
         raise HTTPException(status_code=404, detail="Unable to read file contents")
 
+    response.headers.update(headers)
     return HexPreview(path=_relative_path_to_string(relative_path), lines=lines)
 
 
+@app.post("/api/file-hex-batch")
+async def fetch_file_hex_batch(request: HexPreviewBatchRequest) -> List[HexPreview]:
+    """Fetch hex dump lines for several files in one round trip.
+
+    Paths that cannot be previewed are omitted from the response.
+    """
+    if len(request.paths) > HEX_BATCH_MAX_PATHS:
+        raise HTTPException(status_code=400, detail=f"At most {HEX_BATCH_MAX_PATHS} paths per batch")
+
+    return await asyncio.to_thread(_collect_hex_previews, request.paths, request.max_bytes)
+
+
+def _collect_hex_previews(paths: List[str], max_bytes: int) -> List[HexPreview]:
+    previews: List[HexPreview] = []
+    seen = set()
+    for path in paths:
+        try:
+            relative_str = _relative_path_to_string(_normalize_relative_path(path))
+            if relative_str in seen:
+                continue
+            seen.add(relative_str)
+            safe_path = get_safe_path(path)
+            stat_info = os.stat(safe_path)
+        except (HTTPException, OSError):
+            continue
+        if not stat.S_ISREG(stat_info.st_mode):
+            continue
+        lines = get_hex_preview(safe_path, max_bytes, stat_info)
+        if lines is not None:
+            previews.append(HexPreview.model_construct(path=relative_str, lines=lines))
+    return previews
+
+
 @app.get("/api/file-preview")
 async def fetch_file_preview(path: str):
     """Stream file contents for media and texture previews."""
-    safe_path = get_safe_path(path)
-
-    if not safe_path.is_file():
-        raise HTTPException(status_code=400, detail="Path is not a file")
+    safe_path, stat_info = await asyncio.to_thread(_regular_file_or_400, path)
 
-    media_type = mimetypes.guess_type(str(safe_path))[0] or "application/octet-stream"
-    return FileResponse(str(safe_path), media_type=media_type)
+    media_type = _guess_mime_type(safe_path.name) or "application/octet-stream"
+    # Handing over our stat result saves FileResponse a second stat. It already
+    # reads in 64 KiB chunks and answers Range requests (206/416), so the 3D view
+    # can seek into large media without downloading it again.
+    return FileResponse(str(safe_path), media_type=media_type, stat_result=stat_info)
 
 
-@app.get("/api/favourites")
-async def get_favourites() -> List[str]:
-    return load_favourites()
+@app.get("/api/favourites", response_model=None, responses={200: {"model": List[str]}})
+async def get_favourites() -> Response:
+    return Response(content=orjson.dumps(load_favourites()), media_type="application/json")
 
 
-@app.post("/api/favourites")
-async def set_favourite(request: FavouriteRequest) -> List[str]:
+@app.post("/api/favourites", response_model=None, responses={200: {"model": List[str]}})
+async def set_favourite(request: FavouriteRequest) -> Response:
     relative_path = _normalize_relative_path(request.path)
     relative_str = _relative_path_to_string(relative_path)
-    favourites = set(load_favourites())
+    favourites = load_favourite_set()
 
     if request.favourite:
         get_safe_path(request.path)
-        favourites.add(relative_str)
+        updated = favourites | {relative_str}
     else:
-        favourites.discard(relative_str)
+        updated = favourites - {relative_str}
 
-    sorted_favs = sorted(favourites)
-    save_favourites(sorted_favs)
-    return sorted_favs
+    sorted_favs = sorted(updated)
+    # Rewriting an unchanged file would only invalidate the favourites cache.
+    if updated != favourites:
+        save_favourites(sorted_favs)
+    return Response(content=orjson.dumps(sorted_favs), media_type="application/json")
 
 
 @app.get("/api/open-files")
@@ -669,46 +1482,107 @@ async def get_open_files(directory: Optional[str] = None) -> List[OpenFileEntry]
 
 
 @app.get("/api/file-info")
-async def get_file_info(path: str) -> FileInfo:
+async def get_file_info(request: Request, response: Response, path: str) -> FileInfo:
     """
     Get detailed information about a specific file
     """
     relative_path = _normalize_relative_path(path)
-    safe_path = get_safe_path(path)
 
     try:
-        stat_info = safe_path.stat()
-        favourite_paths = set(load_favourites())
+        safe_path, stat_info = await asyncio.to_thread(_validated_stat, path)
+        favourite_paths = load_favourite_set()
         relative_str = _relative_path_to_string(relative_path)
 
-        is_directory = safe_path.is_dir()
-        display_name = safe_path.name
-        if safe_path == ROOT_DIR:
-            display_name = ROOT_DIR.name or "/"
-        if not display_name:
-            display_name = "/"
-
-        mime_type = None if is_directory else mimetypes.guess_type(str(safe_path))[0]
-        file_info = FileInfo(
-            name=display_name,
-            path=relative_str,
-            is_directory=is_directory,
-            size=stat_info.st_size if not is_directory else 0,
-            modified=stat_info.st_mtime,
-            log_size=calculate_log_size(stat_info.st_size) if not is_directory else 1.0,
-            mime_type=mime_type,
-            is_favourite=relative_str in favourite_paths
-        )
-
-        if not safe_path.is_dir():
-            file_info.hex_preview = get_hex_preview(safe_path, max_bytes=512)
+        is_favourite = relative_str in favourite_paths
+        headers = _cache_headers(_etag_for_stat(stat_info, is_favourite), stat_info.st_mtime)
+        if _etag_matches(request, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
 
+        file_info = _file_info_cache_get(_file_info_cache_key(relative_str, stat_info, is_favourite))
+        if file_info is None:
+            file_info = await asyncio.to_thread(
+                _file_info_from_stat, relative_str, safe_path, stat_info, is_favourite
+            )
+        response.headers.update(headers)
         return file_info
 
     except (OSError, PermissionError) as e:
         raise HTTPException(status_code=403, detail=f"Cannot access file: {str(e)}")
 
 
+@app.post("/api/file-info-batch")
+async def get_file_info_batch(request: FileInfoBatchRequest) -> List[FileInfo]:
+    """Fetch file details for several paths in one round trip.
+
+    Paths that cannot be described are omitted from the response.
+    """
+    if len(request.paths) > FILE_INFO_BATCH_MAX_PATHS:
+        raise HTTPException(status_code=400, detail=f"At most {FILE_INFO_BATCH_MAX_PATHS} paths per batch")
+
+    return await asyncio.to_thread(_collect_file_infos, request.paths, load_favourite_set())
+
+
+def _file_info_cache_key(relative_str: str, stat_info: os.stat_result, is_favourite: bool) -> tuple:
+    return (
+        relative_str, stat_info.st_dev, stat_info.st_ino,
+        stat_info.st_size, stat_info.st_mtime_ns, is_favourite
+    )
+
+
+def _file_info_from_stat(
+    relative_str: str,
+    safe_path: Path,
+    stat_info: os.stat_result,
+    is_favourite: bool
+) -> FileInfo:
+    """Build the FileInfo for a stat'ed path, reading its hex preview, and cache it."""
+    is_directory = stat.S_ISDIR(stat_info.st_mode)
+    display_name = safe_path.name
+    if safe_path == ROOT_DIR:
+        display_name = ROOT_DIR.name or "/"
+    if not display_name:
+        display_name = "/"
+
+    mime_type = None if is_directory else _guess_mime_type(safe_path.name)
+    file_info = FileInfo(
+        name=display_name,
+        path=relative_str,
+        is_directory=is_directory,
+        size=stat_info.st_size if not is_directory else 0,
+        modified=stat_info.st_mtime,
+        log_size=calculate_log_size(stat_info.st_size) if not is_directory else 1.0,
+        mime_type=mime_type,
+        is_favourite=is_favourite
+    )
+
+    if stat.S_ISREG(stat_info.st_mode):
+        file_info.hex_preview = get_hex_preview(safe_path, 512, stat_info)
+
+    _file_info_cache_put(_file_info_cache_key(relative_str, stat_info, is_favourite), file_info)
+    return file_info
+
+
+def _collect_file_infos(paths: List[str], favourite_paths: FrozenSet[str]) -> List[FileInfo]:
+    infos: List[FileInfo] = []
+    seen = set()
+    for path in paths:
+        try:
+            relative_str = _relative_path_to_string(_normalize_relative_path(path))
+            if relative_str in seen:
+                continue
+            seen.add(relative_str)
+            safe_path = get_safe_path(path)
+            stat_info = os.stat(safe_path)
+        except (HTTPException, OSError):
+            continue
+        is_favourite = relative_str in favourite_paths
+        file_info = _file_info_cache_get(_file_info_cache_key(relative_str, stat_info, is_favourite))
+        if file_info is None:
+            file_info = _file_info_from_stat(relative_str, safe_path, stat_info, is_favourite)
+        infos.append(file_info)
+    return infos
+
+
 if __name__ == "__main__":
     import uvicorn
     parser = argparse.ArgumentParser(description="Run the FileCity server")
@@ -764,6 +1638,8 @@ if __name__ == "__main__":
     except ValueError as exc:
         parser.error(str(exc))
 
+    ROOT_DIR_STR = os.fspath(ROOT_DIR)
+    ROOT_DIR_PREFIX = ROOT_DIR_STR if ROOT_DIR_STR.endswith(os.sep) else ROOT_DIR_STR + os.sep
     os.environ["FILECITY_ROOT_DIR"] = str(ROOT_DIR)
     HOST = args.host
     PORT = args.port